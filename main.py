@@ -1,15 +1,393 @@
+import sys
+import time
+STARTED_AT = time.perf_counter()
+
+# Com --profile-startup o cProfile é ativado antes dos demais imports, para
+# que o relatório inclua o custo de carregar o módulo
+if '--profile-startup' in sys.argv:
+    import cProfile
+    STARTUP_PROFILER = cProfile.Profile()
+    STARTUP_PROFILER.enable()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 import os
 import json
-import csv
 import datetime
-import smtplib
-from email.mime.text import MIMEText
-from cryptography.fernet import Fernet
+import io
+import re
+import mmap
+import shutil
 import base64
+import queue
+import threading
+
+# Módulos usados apenas no envio, na gravação de logs ou na criptografia
+# (smtplib, email, csv, minidom, cryptography...) são importados sob demanda
+# para que a janela principal apareça o quanto antes.
+
+# [SECTION] MIME PRÉ-RENDERIZADO
+class PreRenderedMessage:
+    """Mensagem MIME serializada uma única vez por campanha.
+
+    O corpo e os cabeçalhos comuns são codificados em bytes (já com o
+    escape de pontos exigido pelo comando DATA); a cada envio apenas o
+    cabeçalho To é gerado e inserido entre o prefixo e o sufixo. O sufixo
+    fica em um arquivo temporário mapeado via mmap, para que anexos grandes
+    não sejam mantidos em memória.
+    """
+    def __init__(self, prefix, suffix_path, owner=True):
+        self.prefix = prefix
+        self.suffix_path = suffix_path
+        self.owner = owner
+        with open(suffix_path, 'rb') as f:
+            self.suffix = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        """Libera o mapeamento e remove o arquivo temporário, se for o dono"""
+        self.suffix.close()
+        if self.owner:
+            os.remove(self.suffix_path)
+    
+    @classmethod
+    def compose(cls, subject, body, sender, html=None, attachments=()):
+        """Monta a mensagem (texto, alternativa HTML e anexos) e a serializa"""
+        import tempfile
+        from email import policy
+        from email.mime.multipart import MIMEMultipart
+        
+        msg = _text_part(body, 'plain')
+        
+        if html:
+            alternative = MIMEMultipart('alternative', policy=policy.SMTP)
+            alternative.attach(msg)
+            alternative.attach(_text_part(html, 'html'))
+            msg = alternative
+        
+        fd, suffix_path = tempfile.mkstemp(suffix='.eml')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                if attachments:
+                    # Os anexos são codificados direto no arquivo, sem passar pelo gerador
+                    boundary = f"==============={os.urandom(16).hex()}=="
+                    mixed = MIMEMultipart('mixed', boundary=boundary, policy=policy.SMTP)
+                    mixed['Subject'] = subject
+                    mixed['From'] = sender
+                    prefix = _serialize_headers(mixed)
+                    
+                    delimiter = f"--{boundary}\r\n".encode('ascii')
+                    out.write(b'\r\n' + delimiter)
+                    out.write(_quote_periods(_serialize(msg)))
+                    for path in attachments:
+                        out.write(b'\r\n' + delimiter)
+                        write_attachment(out, path)
+                    out.write(f"\r\n--{boundary}--\r\n".encode('ascii'))
+                else:
+                    msg['Subject'] = subject
+                    msg['From'] = sender
+                    headers, _, body_bytes = _serialize(msg).partition(b'\r\n\r\n')
+                    prefix = headers + b'\r\n'
+                    suffix = _quote_periods(b'\r\n' + body_bytes)
+                    out.write(suffix if suffix.endswith(b'\r\n') else suffix + b'\r\n')
+            return cls(prefix, suffix_path)
+        except BaseException:
+            os.remove(suffix_path)
+            raise
+    
+    def recipient_header(self, recipient):
+        """Gera o cabeçalho To codificado para um destinatário"""
+        from email import policy
+        
+        header = policy.SMTP.header_factory('To', recipient)
+        return header.fold(policy=policy.SMTP).encode('ascii')
+    
+    def send(self, server, sender, recipient):
+        """Envia a mensagem por uma conexão SMTP já autenticada"""
+        import smtplib
+        
+        server.ehlo_or_helo_if_needed()
+        code, resp = server.mail(sender)
+        if code == 250:
+            code, resp = server.rcpt(recipient)
+        if code in (250, 251):
+            server.putcmd('data')
+            code, resp = server.getreply()
+            if code == 354:
+                # Os blocos já estão em bytes: nenhum reencoding por destinatário
+                server.send(self.prefix)
+                server.send(self.recipient_header(recipient))
+                server.send(self.suffix)
+                server.send(b'.\r\n')
+                code, resp = server.getreply()
+                if code == 250:
+                    return
+        
+        try:
+            server.rset()
+        except smtplib.SMTPServerDisconnected:
+            pass
+        raise smtplib.SMTPResponseException(code, resp)
+
+ATTACHMENT_CHUNK = 57 * 16384
+
+def _text_part(text, subtype):
+    """Parte de texto em 7bit quando possível, senão quoted-printable.
+
+    Corpos de texto em base64 são penalizados por filtros de spam.
+    """
+    from email import policy
+    from email.message import EmailMessage
+    
+    ascii_only = text.isascii() and all(len(line) <= policy.SMTP.max_line_length for line in text.splitlines())
+    part = EmailMessage(policy=policy.SMTP)
+    part.set_content(text, subtype=subtype, charset='utf-8', cte='7bit' if ascii_only else 'quoted-printable')
+    return part
+
+def write_attachment(out, path):
+    """Grava um anexo codificado em base64, lendo-o via mmap em blocos.
+
+    Linhas base64 nunca começam com ponto, então dispensam o escape do DATA.
+    """
+    import mimetypes
+    from email import policy
+    from email.mime.base import MIMEBase
+    
+    ctype, encoding = mimetypes.guess_type(path)
+    if ctype is None or encoding is not None:
+        ctype = 'application/octet-stream'
+    maintype, subtype = ctype.split('/', 1)
+    
+    part = MIMEBase(maintype, subtype, policy=policy.SMTP)
+    part['Content-Transfer-Encoding'] = 'base64'
+    part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(path))
+    out.write(_serialize_headers(part) + b'\r\n')
+    
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # Múltiplo de 57 bytes: cada bloco termina em uma linha completa de 76 caracteres
+            for start in range(0, len(data), ATTACHMENT_CHUNK):
+                out.write(base64.encodebytes(data[start:start + ATTACHMENT_CHUNK]).replace(b'\n', b'\r\n'))
+
+def _serialize(msg):
+    """Serializa uma mensagem (ou parte) em bytes com quebras CRLF"""
+    from email import policy
+    from email.generator import BytesGenerator
+    
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, policy=policy.SMTP).flatten(msg)
+    return buffer.getvalue()
+
+def _serialize_headers(msg):
+    """Serializa apenas os cabeçalhos (sem a linha em branco final)"""
+    from email import policy
+    
+    return b''.join(policy.SMTP.fold_binary(name, value) for name, value in msg.items())
+
+def message_extras_paths(filename):
+    """Caminhos do HTML alternativo e da pasta de anexos de uma mensagem"""
+    base = os.path.splitext(filename)[0]
+    return (os.path.join('mensagens', f"{base}.html"),
+            os.path.join('mensagens', f"{base}_anexos"))
+
+def load_message_extras(filename):
+    """Lê o HTML alternativo e lista os anexos de uma mensagem"""
+    html_path, attachments_dir = message_extras_paths(filename)
+    
+    html = None
+    if os.path.exists(html_path):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+    
+    return html, list_attachments(attachments_dir)
+
+def list_attachments(attachments_dir):
+    """Lista os arquivos regulares da pasta de anexos, em ordem alfabética"""
+    if not os.path.isdir(attachments_dir):
+        return []
+    return sorted(os.path.join(attachments_dir, name) for name in os.listdir(attachments_dir)
+                  if os.path.isfile(os.path.join(attachments_dir, name)))
+
+def read_contacts(path='contatos.xml'):
+    """Lê a lista de contatos (nome, email) do arquivo XML"""
+    if not os.path.exists(path):
+        return []
+    
+    tree = ET.parse(path)
+    return [(contact.find('nome').text, contact.find('email').text)
+            for contact in tree.getroot().findall('contato')]
+
+def describe_message_format(filename):
+    """Resume o formato da mensagem (texto, HTML e quantidade de anexos)"""
+    html_path, attachments_dir = message_extras_paths(filename)
+    description = "Texto + HTML" if os.path.exists(html_path) else "Texto"
+    count = len(list_attachments(attachments_dir))
+    if count:
+        description += f", {count} anexo(s)"
+    return description
+
+def read_messages(directory='mensagens'):
+    """Lista as mensagens (assunto, arquivo, formato) da pasta de mensagens"""
+    messages = []
+    for filename in os.listdir(directory):
+        if filename.endswith('.txt'):
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                subject = f.readline().strip()
+            messages.append((subject, filename, describe_message_format(filename)))
+    return messages
+
+def read_logins(path='logins.json'):
+    """Lê os logins (email, servidor) do arquivo JSON"""
+    if not os.path.exists(path):
+        return []
+    
+    with open(path, 'r') as f:
+        return [(login['email'], login['server']) for login in json.load(f)]
+
+# [SECTION] ENVIO EM LOTES
+LOG_FILE = os.path.join('logs', 'envios.csv')
+# Provedores limitam conexões SMTP simultâneas por conta
+DEFAULT_MAX_CONNECTIONS = 3
+LOG_PART_PATTERN = os.path.join('logs', 'envios.parte-{campaign}-{index:04d}.csv')
+
+def log_row(sender, recipient, subject, status):
+    """Monta uma linha do registro de envios"""
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return [timestamp, sender, recipient, subject, status]
+
+def append_log_rows(rows, path=LOG_FILE):
+    """Acrescenta linhas ao registro de envios"""
+    import csv
+    
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+
+def merge_log_part(part_path):
+    """Incorpora um arquivo parcial de log ao registro de envios e o remove.
+
+    Retorna a quantidade de linhas incorporadas.
+    """
+    import csv
+    
+    if not os.path.exists(part_path):
+        return 0
+    with open(part_path, 'r', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    append_log_rows(rows)
+    os.remove(part_path)
+    return len(rows)
+
+def merge_pending_log_parts():
+    """Incorpora partes de log deixadas por uma campanha interrompida"""
+    import glob
+    
+    for part_path in sorted(glob.glob(LOG_PART_PATTERN.replace('{campaign}-{index:04d}', '*'))):
+        merge_log_part(part_path)
+
+def send_batch(login, message, subject, recipients, log):
+    """Envia a mensagem para uma lista de destinatários por uma única conexão SMTP.
+
+    Cada envio é registrado por `log(linha)` logo após a resposta do servidor.
+    """
+    import smtplib
+    
+    server = smtplib.SMTP(login['server'], login['port'])
+    server.starttls()
+    server.login(login['email'], login['password'])
+    
+    for recipient in recipients:
+        try:
+            message.send(server, login['email'], recipient)
+            log(log_row(login['email'], recipient, subject, "Sucesso"))
+        except Exception as e:
+            log(log_row(login['email'], recipient, subject, f"Falha: {str(e)}"))
+    
+    try:
+        server.quit()
+    except smtplib.SMTPServerDisconnected:
+        pass
+
+def send_shard(login, prefix, suffix_path, subject, recipients, part_path):
+    """Processa um lote da campanha em um processo separado.
+
+    O corpo serializado é mapeado via mmap, de modo que os processos
+    compartilham as mesmas páginas em vez de manter uma cópia cada. Cada
+    envio é gravado imediatamente no arquivo parcial de log do lote.
+    """
+    import csv
+    
+    with open(part_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        
+        def log(row):
+            writer.writerow(row)
+            f.flush()
+        
+        with PreRenderedMessage(prefix, suffix_path, owner=False) as message:
+            send_batch(login, message, subject, recipients, log)
+
+def campaign_workers(login):
+    """Processos da campanha: núcleos disponíveis, limitados às conexões permitidas pela conta"""
+    return max(1, min(os.cpu_count() or 1, login.get('max_connections', DEFAULT_MAX_CONNECTIONS)))
+
+def split_shards(items, count):
+    """Divide a lista em até `count` lotes contíguos, preservando a ordem"""
+    size, extra = divmod(len(items), count)
+    shards, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            shards.append(items[start:end])
+        start = end
+    return shards
+
+def send_campaign_sharded(login, message, subject, recipients, workers=None):
+    """Distribui os destinatários entre processos e registra os logs em ordem.
+
+    Cada lote grava seus envios em um arquivo parcial em logs/, que é
+    incorporado a envios.csv assim que o lote e todos os anteriores terminam.
+    Se o processo for interrompido, as partes restantes continuam em logs/ e
+    são incorporadas no início da próxima campanha.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    merge_pending_log_parts()
+    
+    workers = max(1, min(workers or campaign_workers(login), len(recipients)))
+    shards = split_shards(recipients, workers)
+    campaign = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+    parts = [LOG_PART_PATTERN.format(campaign=campaign, index=i) for i in range(len(shards))]
+    
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [executor.submit(send_shard, login, message.prefix, message.suffix_path, subject, shard, part)
+                   for shard, part in zip(shards, parts)]
+        
+        for shard, part, future in zip(shards, parts, futures):
+            try:
+                future.result()
+                error = None
+            except Exception as e:
+                error = e
+            
+            logged = merge_log_part(part)
+            if error is not None:
+                append_log_rows(log_row(login['email'], recipient, subject, f"Falha: {str(error)}")
+                                for recipient in shard[logged:])
+
+def _quote_periods(data):
+    """Duplica pontos no início de linha (transparência do comando DATA)"""
+    return re.sub(br'(?m)^\.', b'..', data)
+
+# Linhas inseridas por vez ao preencher as listas da interface
+FILL_CHUNK = 500
 
 class EmailApp:
     def __init__(self, root):
@@ -20,20 +398,19 @@ class EmailApp:
         
         # Configurações iniciais
         self.current_login = None
+        self.selected_message_file = None
+        self.loaded_data = {}
+        self.load_errors = {}
         self.setup_directories()
         self.setup_encryption()
         
-        # Interface principal
+        # Interface principal (o conteúdo das abas é montado na primeira seleção)
+        self.create_status_bar()
         self.create_notebook()
-        self.setup_contacts_tab()
-        self.setup_messages_tab()
-        self.setup_logins_tab()
-        self.setup_review_tab()
+        self.ensure_tab(self.contacts_tab)
         
-        # Carregar dados
-        self.load_contacts()
-        self.load_messages()
-        self.load_logins()
+        # Carregar dados em segundo plano
+        self.start_background_load()
     
     def setup_directories(self):
         """Cria os diretórios necessários para o aplicativo"""
@@ -50,6 +427,7 @@ class EmailApp:
         if os.path.exists(key_file):
             with open(key_file, 'rb') as f:
                 return f.read()
+        from cryptography.fernet import Fernet
         key = Fernet.generate_key()
         with open(key_file, 'wb') as f:
             f.write(key)
@@ -57,11 +435,13 @@ class EmailApp:
     
     def encrypt_data(self, data):
         """Criptografa dados sensíveis"""
+        from cryptography.fernet import Fernet
         cipher_suite = Fernet(self.key)
         return cipher_suite.encrypt(data.encode()).decode()
     
     def decrypt_data(self, encrypted_data):
         """Descriptografa dados"""
+        from cryptography.fernet import Fernet
         cipher_suite = Fernet(self.key)
         return cipher_suite.decrypt(encrypted_data.encode()).decode()
     
@@ -81,6 +461,128 @@ class EmailApp:
         self.notebook.add(self.messages_tab, text="Mensagens")
         self.notebook.add(self.logins_tab, text="Gerenciar Logins")
         self.notebook.add(self.review_tab, text="Revisão e Envio")
+        
+        # Abas ainda não montadas
+        self.tab_builders = {
+            str(self.contacts_tab): self.setup_contacts_tab,
+            str(self.messages_tab): self.setup_messages_tab,
+            str(self.logins_tab): self.setup_logins_tab,
+            str(self.review_tab): self.setup_review_tab,
+        }
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.ensure_tab(self.notebook.select()))
+        
+        # Dados carregados em segundo plano: (aba, leitura, preenchimento, descrição)
+        self.data_sources = {
+            'contacts': (self.contacts_tab, read_contacts, self.populate_contacts, "contatos"),
+            'messages': (self.messages_tab, read_messages, self.populate_messages, "mensagens"),
+            'logins': (self.logins_tab, read_logins, self.populate_logins, "logins"),
+        }
+    
+    def ensure_tab(self, tab):
+        """Monta o conteúdo de uma aba na primeira vez em que ela é usada"""
+        builder = self.tab_builders.pop(str(tab), None)
+        if builder is None:
+            return
+        builder()
+        
+        for key, (data_tab, _, populate, _) in self.data_sources.items():
+            if str(data_tab) == str(tab) and key in self.loaded_data:
+                populate(self.loaded_data[key])
+    
+    def is_tab_built(self, tab):
+        """Indica se o conteúdo da aba já foi montado"""
+        return str(tab) not in self.tab_builders
+    
+    def create_status_bar(self):
+        """Cria a barra de status com o indicador de carregamento"""
+        self.status_bar = ttk.Frame(self.root)
+        self.status_bar.pack(side='bottom', fill='x')
+        self.pending_loads = 0
+        self.filling = {}
+        
+        ttk.Label(self.status_bar, text="Carregando dados...").pack(side='left', padx=10, pady=2)
+        self.loading_progress = ttk.Progressbar(self.status_bar, mode='indeterminate', length=150)
+        self.loading_progress.pack(side='left', padx=5, pady=2)
+        self.loading_progress.start(10)
+    
+    def is_loading(self):
+        """Indica se ainda há leituras em segundo plano ou listas sendo preenchidas"""
+        return bool(self.pending_loads or self.filling)
+    
+    def update_loading_indicator(self):
+        """Exibe a barra de status enquanto houver carregamento em andamento"""
+        if self.is_loading():
+            if not self.status_bar.winfo_ismapped():
+                self.status_bar.pack(side='bottom', fill='x', before=self.notebook)
+                self.loading_progress.start(10)
+        else:
+            self.loading_progress.stop()
+            self.status_bar.pack_forget()
+    
+    def fill_tree(self, key, tree, rows):
+        """Preenche uma Treeview em blocos, devolvendo o controle à interface entre eles"""
+        tree.delete(*tree.get_children())
+        token = object()
+        self.filling[key] = token
+        self.update_loading_indicator()
+        
+        def insert_chunk(start):
+            # Um preenchimento mais recente da mesma lista cancela este
+            if self.filling.get(key) is not token:
+                return
+            for values in rows[start:start + FILL_CHUNK]:
+                tree.insert('', 'end', values=values)
+            
+            if start + FILL_CHUNK < len(rows):
+                self.root.after(1, insert_chunk, start + FILL_CHUNK)
+            else:
+                del self.filling[key]
+                self.update_loading_indicator()
+        
+        insert_chunk(0)
+    
+    def start_background_load(self):
+        """Lê contatos, mensagens e logins em uma thread separada"""
+        self.load_queue = queue.Queue()
+        self.pending_loads = len(self.data_sources)
+        readers = [(key, read) for key, (_, read, _, _) in self.data_sources.items()]
+        
+        def worker():
+            for key, read in readers:
+                try:
+                    self.load_queue.put((key, read(), None))
+                except Exception as e:
+                    self.load_queue.put((key, None, e))
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(50, self.poll_background_load)
+    
+    def poll_background_load(self):
+        """Aplica na interface os dados já lidos em segundo plano"""
+        while True:
+            try:
+                key, rows, error = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            self.pending_loads -= 1
+            tab, _, populate, description = self.data_sources[key]
+            # Uma atualização manual feita durante o carregamento tem prioridade
+            if key in self.loaded_data or key in self.load_errors:
+                continue
+            
+            if error is not None:
+                self.load_errors[key] = error
+                messagebox.showerror("Erro", f"Não foi possível carregar {description}:\n{str(error)}")
+                continue
+            self.loaded_data[key] = rows
+            if self.is_tab_built(tab):
+                populate(rows)
+        
+        if self.pending_loads:
+            self.root.after(50, self.poll_background_load)
+        else:
+            self.update_loading_indicator()
     
     # [SECTION] CONTATOS TAB
     def setup_contacts_tab(self):
@@ -115,16 +617,19 @@ class EmailApp:
     
     def load_contacts(self):
         """Carrega contatos do arquivo XML"""
-        self.contacts_tree.delete(*self.contacts_tree.get_children())
-        
-        if not os.path.exists('contatos.xml'):
+        try:
+            contacts = read_contacts()
+        except Exception as e:
+            self.load_errors['contacts'] = e
+            messagebox.showerror("Erro", f"Não foi possível carregar contatos:\n{str(e)}")
             return
-            
-        tree = ET.parse('contatos.xml')
-        for contact in tree.getroot().findall('contato'):
-            name = contact.find('nome').text
-            email = contact.find('email').text
-            self.contacts_tree.insert('', 'end', values=(name, email))
+        self.load_errors.pop('contacts', None)
+        self.loaded_data['contacts'] = contacts
+        self.populate_contacts(contacts)
+    
+    def populate_contacts(self, contacts):
+        """Preenche a lista de contatos"""
+        self.fill_tree('contacts', self.contacts_tree, contacts)
     
     def save_contacts(self):
         """Salva contatos no arquivo XML"""
@@ -139,6 +644,7 @@ class EmailApp:
             ET.SubElement(contact, 'nome').text = name
             ET.SubElement(contact, 'email').text = email
         
+        from xml.dom import minidom
         xml_str = minidom.parseString(ET.tostring(root)).toprettyxml(indent="   ")
         with open('contatos.xml', 'w', encoding='utf-8') as f:
             f.write(xml_str)
@@ -164,16 +670,44 @@ class EmailApp:
             messagebox.showwarning("Aviso", "Selecione um contato para excluir.")
             return
             
+        if not self.contacts_ready():
+            return
+        
         if messagebox.askyesno("Confirmar", "Tem certeza que deseja excluir este contato?"):
+            # A lista pode ter sido recarregada enquanto a confirmação estava aberta
+            if not self.contacts_ready():
+                return
+            if not self.contacts_tree.exists(selected[0]):
+                messagebox.showwarning("Aviso", "A lista de contatos foi atualizada. Selecione o contato novamente.")
+                return
             self.contacts_tree.delete(selected[0])
             self.save_contacts()
     
+    def contacts_ready(self):
+        """Verifica se a lista de contatos está completa antes de alterá-la"""
+        # Salvar com a lista incompleta sobrescreveria contatos.xml
+        if 'contacts' in self.load_errors:
+            messagebox.showerror("Erro", "Não foi possível carregar os contatos:\n"
+                                 f"{str(self.load_errors['contacts'])}\n\n"
+                                 "Corrija o arquivo contatos.xml e clique em Atualizar.")
+            return False
+        if 'contacts' not in self.loaded_data or 'contacts' in self.filling:
+            messagebox.showwarning("Aviso", "Aguarde o carregamento dos contatos.")
+            return False
+        return True
+    
     def contact_dialog(self, name="", email=""):
         """Diálogo para adicionar/editar contatos"""
+        if not self.contacts_ready():
+            return
+        
         dialog = tk.Toplevel(self.root)
         dialog.title("Editar Contato" if name else "Novo Contato")
         dialog.resizable(False, False)
         dialog.iconbitmap("icone-email.ico")
+        # Modal: a lista não pode ser recarregada enquanto o diálogo está aberto
+        dialog.transient(self.root)
+        dialog.grab_set()
         
         # Campos do formulário
         ttk.Label(dialog, text="Nome:").grid(row=0, column=0, padx=5, pady=5, sticky='e')
@@ -191,7 +725,10 @@ class EmailApp:
             new_email = email_entry.get().strip()
             
             if not new_name or not new_email:
-                messagebox.showwarning("Aviso", "Preencha todos os campos.")
+                messagebox.showwarning("Aviso", "Preencha todos os campos.", parent=dialog)
+                return
+            
+            if not self.contacts_ready():
                 return
                 
             # Atualizar ou adicionar
@@ -214,11 +751,13 @@ class EmailApp:
         main_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Treeview para mensagens
-        self.messages_tree = ttk.Treeview(main_frame, columns=('Assunto', 'Arquivo'), show='headings')
+        self.messages_tree = ttk.Treeview(main_frame, columns=('Assunto', 'Arquivo', 'Formato'), show='headings')
         self.messages_tree.heading('Assunto', text='Assunto')
         self.messages_tree.heading('Arquivo', text='Arquivo')
+        self.messages_tree.heading('Formato', text='Formato')
         self.messages_tree.column('Assunto', width=300)
         self.messages_tree.column('Arquivo', width=200)
+        self.messages_tree.column('Formato', width=150)
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(main_frame, orient='vertical', command=self.messages_tree.yview)
@@ -246,13 +785,19 @@ class EmailApp:
     
     def load_messages(self):
         """Carrega mensagens da pasta mensagens/"""
-        self.messages_tree.delete(*self.messages_tree.get_children())
-        
-        for filename in os.listdir('mensagens'):
-            if filename.endswith('.txt'):
-                with open(os.path.join('mensagens', filename), 'r', encoding='utf-8') as f:
-                    subject = f.readline().strip()
-                    self.messages_tree.insert('', 'end', values=(subject, filename))
+        try:
+            messages = read_messages()
+        except Exception as e:
+            self.load_errors['messages'] = e
+            messagebox.showerror("Erro", f"Não foi possível carregar mensagens:\n{str(e)}")
+            return
+        self.load_errors.pop('messages', None)
+        self.loaded_data['messages'] = messages
+        self.populate_messages(messages)
+    
+    def populate_messages(self, messages):
+        """Preenche a lista de mensagens"""
+        self.fill_tree('messages', self.messages_tree, messages)
     
     def show_message_preview(self):
         """Exibe pré-visualização da mensagem selecionada"""
@@ -299,6 +844,11 @@ class EmailApp:
         if messagebox.askyesno("Confirmar", "Tem certeza que deseja excluir esta mensagem?"):
             try:
                 os.remove(os.path.join('mensagens', filename))
+                html_path, attachments_dir = message_extras_paths(filename)
+                if os.path.exists(html_path):
+                    os.remove(html_path)
+                if os.path.isdir(attachments_dir):
+                    shutil.rmtree(attachments_dir)
                 self.load_messages()
                 self.message_preview.delete(1.0, tk.END)
             except Exception as e:
@@ -317,8 +867,42 @@ class EmailApp:
         subject_entry.pack(fill='x', padx=10, pady=5)
         
         ttk.Label(dialog, text="Mensagem:").pack(pady=(10, 5))
-        message_text = tk.Text(dialog, wrap='word')
-        message_text.pack(fill='both', expand=True, padx=10, pady=5)
+        body_notebook = ttk.Notebook(dialog)
+        body_notebook.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        message_text = tk.Text(body_notebook, wrap='word')
+        html_text = tk.Text(body_notebook, wrap='word')
+        body_notebook.add(message_text, text="Texto")
+        body_notebook.add(html_text, text="HTML (opcional)")
+        
+        # Anexos
+        attachments_frame = ttk.LabelFrame(dialog, text="Anexos")
+        attachments_frame.pack(fill='x', padx=10, pady=5)
+        
+        attachments_listbox = tk.Listbox(attachments_frame, height=4)
+        attachments_listbox.pack(side='left', fill='x', expand=True, padx=5, pady=5)
+        attachments = []
+        
+        def add_attachment():
+            for path in filedialog.askopenfilenames(title="Selecionar anexos", parent=dialog):
+                # Os anexos são gravados pelo nome do arquivo na pasta da mensagem
+                name = os.path.basename(path)
+                if any(os.path.basename(existing) == name for existing in attachments):
+                    messagebox.showwarning("Aviso", f"Já existe um anexo chamado {name}.", parent=dialog)
+                    continue
+                attachments.append(path)
+                attachments_listbox.insert(tk.END, name)
+        
+        def remove_attachment():
+            selected = attachments_listbox.curselection()
+            if selected:
+                del attachments[selected[0]]
+                attachments_listbox.delete(selected[0])
+        
+        attachments_buttons = ttk.Frame(attachments_frame)
+        attachments_buttons.pack(side='right', padx=5)
+        ttk.Button(attachments_buttons, text="Adicionar", command=add_attachment).pack(fill='x', pady=2)
+        ttk.Button(attachments_buttons, text="Remover", command=remove_attachment).pack(fill='x', pady=2)
         
         # Preencher campos se estiver editando
         if content:
@@ -326,9 +910,18 @@ class EmailApp:
             subject_entry.insert(0, lines[0])
             message_text.insert(tk.END, '\n'.join(lines[1:]))
         
+        if filename:
+            html, existing = load_message_extras(filename)
+            if html:
+                html_text.insert(tk.END, html)
+            for path in existing:
+                attachments.append(path)
+                attachments_listbox.insert(tk.END, os.path.basename(path))
+        
         def save():
             subject = subject_entry.get().strip()
             message = message_text.get("1.0", tk.END).strip()
+            html = html_text.get("1.0", tk.END).strip()
             
             if not subject or not message:
                 messagebox.showwarning("Aviso", "Preencha todos os campos.")
@@ -355,6 +948,7 @@ class EmailApp:
             try:
                 with open(os.path.join('mensagens', filename_to_save), 'w', encoding='utf-8') as f:
                     f.write(f"{subject}\n{message}")
+                self.save_message_extras(filename_to_save, html, attachments)
                 self.load_messages()
                 dialog.destroy()
             except Exception as e:
@@ -362,6 +956,31 @@ class EmailApp:
         
         ttk.Button(dialog, text="Salvar", command=save).pack(pady=10)
     
+    def save_message_extras(self, filename, html, attachments):
+        """Salva o HTML alternativo e sincroniza a pasta de anexos da mensagem"""
+        html_path, attachments_dir = message_extras_paths(filename)
+        
+        if html:
+            with open(html_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+        elif os.path.exists(html_path):
+            os.remove(html_path)
+        
+        keep = set()
+        if attachments:
+            os.makedirs(attachments_dir, exist_ok=True)
+            for path in attachments:
+                target = os.path.join(attachments_dir, os.path.basename(path))
+                if os.path.abspath(path) != os.path.abspath(target):
+                    shutil.copy2(path, target)
+                keep.add(os.path.basename(path))
+        
+        for path in list_attachments(attachments_dir):
+            if os.path.basename(path) not in keep:
+                os.remove(path)
+        if not keep and os.path.isdir(attachments_dir) and not os.listdir(attachments_dir):
+            os.rmdir(attachments_dir)
+    
     # [SECTION] LOGINS TAB
     def setup_logins_tab(self):
         """Configura a aba de gerenciamento de logins"""
@@ -395,18 +1014,19 @@ class EmailApp:
     
     def load_logins(self):
         """Carrega logins do arquivo JSON"""
-        self.logins_tree.delete(*self.logins_tree.get_children())
-        
-        if not os.path.exists('logins.json'):
-            return
-            
         try:
-            with open('logins.json', 'r') as f:
-                logins = json.load(f)
-                for login in logins:
-                    self.logins_tree.insert('', 'end', values=(login['email'], login['server']))
+            logins = read_logins()
         except Exception as e:
+            self.load_errors['logins'] = e
             messagebox.showerror("Erro", f"Não foi possível carregar logins:\n{str(e)}")
+            return
+        self.load_errors.pop('logins', None)
+        self.loaded_data['logins'] = logins
+        self.populate_logins(logins)
+    
+    def populate_logins(self, logins):
+        """Preenche a lista de logins"""
+        self.fill_tree('logins', self.logins_tree, logins)
     
     def save_logins(self, logins):
         """Salva logins no arquivo JSON"""
@@ -483,7 +1103,8 @@ class EmailApp:
                     'email': login['email'],
                     'password': self.decrypt_data(login['password']),
                     'server': login['server'],
-                    'port': login.get('port', 587)
+                    'port': login.get('port', 587),
+                    'max_connections': login.get('max_connections', DEFAULT_MAX_CONNECTIONS)
                 }
                 messagebox.showinfo("Sucesso", f"Login {email} selecionado para envio!")
         except Exception as e:
@@ -515,6 +1136,11 @@ class EmailApp:
         port_entry.grid(row=3, column=1, padx=5, pady=5)
         port_entry.insert(0, "587")
         
+        ttk.Label(dialog, text="Conexões simultâneas:").grid(row=4, column=0, padx=5, pady=5, sticky='e')
+        connections_entry = ttk.Entry(dialog, width=30)
+        connections_entry.grid(row=4, column=1, padx=5, pady=5)
+        connections_entry.insert(0, str(login.get('max_connections', DEFAULT_MAX_CONNECTIONS) if login else DEFAULT_MAX_CONNECTIONS))
+        
         # Preencher campos se estiver editando
         if login:
             email_entry.insert(0, login['email'])
@@ -527,8 +1153,9 @@ class EmailApp:
             password = password_entry.get().strip()
             server = server_entry.get().strip()
             port = port_entry.get().strip()
+            max_connections = connections_entry.get().strip()
             
-            if not all([email, password, server, port]):
+            if not all([email, password, server, port, max_connections]):
                 messagebox.showwarning("Aviso", "Preencha todos os campos.")
                 return
                 
@@ -538,6 +1165,14 @@ class EmailApp:
                 messagebox.showwarning("Aviso", "Porta deve ser um número.")
                 return
             
+            try:
+                max_connections = int(max_connections)
+                if max_connections < 1:
+                    raise ValueError
+            except ValueError:
+                messagebox.showwarning("Aviso", "Conexões simultâneas deve ser um número maior que zero.")
+                return
+            
             # Carregar logins existentes
             logins = []
             if os.path.exists('logins.json'):
@@ -556,7 +1191,8 @@ class EmailApp:
                 'email': email,
                 'password': encrypted_password,
                 'server': server,
-                'port': port
+                'port': port,
+                'max_connections': max_connections
             }
             
             if existing is not None:
@@ -568,7 +1204,7 @@ class EmailApp:
                 self.load_logins()
                 dialog.destroy()
         
-        ttk.Button(dialog, text="Salvar", command=save).grid(row=4, column=1, sticky='e', padx=5, pady=10)
+        ttk.Button(dialog, text="Salvar", command=save).grid(row=5, column=1, sticky='e', padx=5, pady=10)
     
     # [SECTION] REVIEW TAB
     def setup_review_tab(self):
@@ -598,9 +1234,11 @@ class EmailApp:
         ttk.Button(buttons_frame, text="Selecionar Contatos", command=self.select_contacts).pack(side='left', padx=5)
         ttk.Button(buttons_frame, text="Selecionar Mensagem", command=self.select_message).pack(side='left', padx=5)
         ttk.Button(buttons_frame, text="Enviar Emails", command=self.send_emails).pack(side='right', padx=5)
+        ttk.Button(buttons_frame, text="Enviar Campanha", command=self.send_campaign).pack(side='right', padx=5)
     
     def select_contacts(self):
         """Seleciona contatos para envio"""
+        self.ensure_tab(self.contacts_tab)
         selected_items = self.contacts_tree.selection()
         self.selected_contacts_listbox.delete(0, tk.END)
         
@@ -610,6 +1248,7 @@ class EmailApp:
     
     def select_message(self):
         """Seleciona mensagem para envio"""
+        self.ensure_tab(self.messages_tab)
         selected = self.messages_tree.selection()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione uma mensagem para enviar.")
@@ -620,9 +1259,34 @@ class EmailApp:
             with open(os.path.join('mensagens', filename), 'r', encoding='utf-8') as f:
                 self.selected_message_text.delete(1.0, tk.END)
                 self.selected_message_text.insert(tk.END, f.read())
+            self.selected_message_file = filename
         except Exception as e:
             messagebox.showerror("Erro", f"Não foi possível ler a mensagem:\n{str(e)}")
     
+    def prepare_message(self):
+        """Valida e pré-renderiza a mensagem selecionada, retornando (assunto, mensagem)"""
+        message_content = self.selected_message_text.get("1.0", tk.END).strip()
+        if not message_content:
+            messagebox.showwarning("Aviso", "Selecione uma mensagem para enviar.")
+            return None
+        
+        # Extrair assunto e corpo
+        subject = message_content.split('\n')[0]
+        body = '\n'.join(message_content.split('\n')[1:])
+        
+        # HTML alternativo e anexos do modelo selecionado
+        html, attachments = None, []
+        try:
+            if self.selected_message_file:
+                html, attachments = load_message_extras(self.selected_message_file)
+            
+            # Mensagem MIME codificada uma única vez para toda a campanha
+            message = PreRenderedMessage.compose(subject, body, self.current_login['email'], html, attachments)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Não foi possível montar a mensagem:\n{str(e)}")
+            return None
+        return subject, message
+    
     def send_emails(self):
         """Envia emails para os contatos selecionados"""
         # Verificar condições para envio
@@ -633,56 +1297,76 @@ class EmailApp:
         if self.selected_contacts_listbox.size() == 0:
             messagebox.showwarning("Aviso", "Selecione pelo menos um contato.")
             return
+        
+        recipients = []
+        for i in range(self.selected_contacts_listbox.size()):
+            contact = self.selected_contacts_listbox.get(i)
+            recipients.append(contact.split('<')[1].split('>')[0].strip())
+        
+        # A mensagem cria um arquivo temporário: só depois de tudo validado
+        prepared = self.prepare_message()
+        if not prepared:
+            return
+        subject, message = prepared
+        
+        try:
+            with message:
+                send_batch(self.current_login, message, subject, recipients,
+                           lambda row: self.log_emails([row]))
+            messagebox.showinfo("Sucesso", f"Emails enviados para {len(recipients)} contatos!")
+            self.add_logs_tab()
             
-        message_content = self.selected_message_text.get("1.0", tk.END).strip()
-        if not message_content:
+        except Exception as e:
+            messagebox.showerror("Erro", f"Falha no envio:\n{str(e)}")
+    
+    def send_campaign(self):
+        """Envia a mensagem para todos os contatos de contatos.xml em vários processos"""
+        if not self.current_login:
+            messagebox.showwarning("Aviso", "Selecione um login na aba 'Gerenciar Logins' primeiro.")
+            return
+        
+        if not self.selected_message_text.get("1.0", tk.END).strip():
             messagebox.showwarning("Aviso", "Selecione uma mensagem para enviar.")
             return
         
-        # Extrair assunto e corpo
-        subject = message_content.split('\n')[0]
-        body = '\n'.join(message_content.split('\n')[1:])
+        try:
+            recipients = [email for _, email in read_contacts()]
+        except Exception as e:
+            messagebox.showerror("Erro", f"Não foi possível ler os contatos:\n{str(e)}")
+            return
+        
+        if not recipients:
+            messagebox.showwarning("Aviso", "Nenhum contato cadastrado em contatos.xml.")
+            return
+        
+        workers = min(campaign_workers(self.current_login), len(recipients))
+        if not messagebox.askyesno("Confirmar", f"Enviar campanha para {len(recipients)} contatos usando {workers} processo(s)?"):
+            return
+        
+        # Anexos só são codificados quando a campanha vai de fato ser enviada
+        prepared = self.prepare_message()
+        if not prepared:
+            return
+        subject, message = prepared
         
-        # Configurar servidor SMTP
         try:
-            server = smtplib.SMTP(self.current_login['server'], self.current_login['port'])
-            server.starttls()
-            server.login(self.current_login['email'], self.current_login['password'])
-            
-            # Enviar para cada contato
-            for i in range(self.selected_contacts_listbox.size()):
-                contact = self.selected_contacts_listbox.get(i)
-                recipient = contact.split('<')[1].split('>')[0].strip()
-                
-                # Criar mensagem MIME
-                msg = MIMEText(body)
-                msg['Subject'] = subject
-                msg['From'] = self.current_login['email']
-                msg['To'] = recipient
-                
-                try:
-                    server.sendmail(self.current_login['email'], recipient, msg.as_string())
-                    self.log_email(self.current_login['email'], recipient, subject, "Sucesso")
-                except Exception as e:
-                    self.log_email(self.current_login['email'], recipient, subject, f"Falha: {str(e)}")
-            
-            server.quit()
-            messagebox.showinfo("Sucesso", f"Emails enviados para {self.selected_contacts_listbox.size()} contatos!")
+            with message:
+                send_campaign_sharded(self.current_login, message, subject, recipients, workers)
+            messagebox.showinfo("Sucesso", f"Campanha enviada para {len(recipients)} contatos!")
             self.add_logs_tab()
             
         except Exception as e:
-            messagebox.showerror("Erro", f"Falha no envio:\n{str(e)}")
+            messagebox.showerror("Erro", f"Falha no envio da campanha:\n{str(e)}")
     
     # [SECTION] LOGS SYSTEM
     def log_email(self, sender, recipient, subject, status):
         """Registra um envio no arquivo de logs"""
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = [timestamp, sender, recipient, subject, status]
-        
+        self.log_emails([log_row(sender, recipient, subject, status)])
+    
+    def log_emails(self, rows):
+        """Registra vários envios no arquivo de logs de uma só vez"""
         try:
-            with open('logs/envios.csv', 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(log_entry)
+            append_log_rows(rows)
         except Exception as e:
             messagebox.showerror("Erro", f"Não foi possível registrar o envio:\n{str(e)}")
     
@@ -718,6 +1402,7 @@ class EmailApp:
         
         # Carregar logs
         try:
+            import csv
             with open('logs/envios.csv', 'r', encoding='utf-8') as f:
                 reader = csv.reader(f)
                 next(reader)  # Pular cabeçalho
@@ -726,8 +1411,56 @@ class EmailApp:
         except Exception as e:
             messagebox.showerror("Erro", f"Não foi possível carregar os logs:\n{str(e)}")
 
+# [SECTION] PERFIL DE INICIALIZAÇÃO
+STARTUP_TARGET_MS = 300
+
+def profile_startup(report_path=os.path.join('logs', 'startup_profile.txt')):
+    """Mede o tempo até a primeira janela e grava um relatório do cProfile.
+
+    Os tempos contam a partir do início de main.py, incluindo os imports.
+    """
+    profiler = STARTUP_PROFILER
+    lines = [f"Carregamento do módulo (imports): {(MODULE_LOADED_AT - STARTED_AT) * 1000:.0f} ms"]
+    first_window = None
+    
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        profiler.disable()
+        lines.append(f"Não foi possível criar a janela: {str(e)}")
+    else:
+        app = EmailApp(root)
+        root.update()
+        profiler.disable()
+        first_window = (time.perf_counter() - STARTED_AT) * 1000
+        lines.append(f"Tempo até a primeira janela: {first_window:.0f} ms (meta: {STARTUP_TARGET_MS} ms)")
+        
+        # Aguardar o carregamento em segundo plano para registrar o tempo total
+        while app.is_loading():
+            root.update()
+            time.sleep(0.01)
+        lines.append(f"Dados carregados em segundo plano após: {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms")
+        root.destroy()
+    
+    import pstats
+    
+    summary = "\n".join(lines) + "\n"
+    stream = io.StringIO()
+    stream.write(summary + "\n")
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(25)
+    
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(stream.getvalue())
+    print(summary + f"Relatório completo em {report_path}")
+    return first_window is not None and first_window <= STARTUP_TARGET_MS
+
+MODULE_LOADED_AT = time.perf_counter()
+
 # Inicialização do aplicativo
 if __name__ == "__main__":
+    if '--profile-startup' in sys.argv:
+        sys.exit(0 if profile_startup() else 1)
+    
     root = tk.Tk()
     app = EmailApp(root)
     root.mainloop()